@@ -1,15 +1,18 @@
-import sys
 from .tdm_loader import *
 
-if sys.version_info.major >= 3 and sys.version_info.minor > 7:
+
+def __getattr__(name):
+    # The version is looked up on first access only, as reading the
+    # distribution metadata is comparatively slow and rarely needed.
+    if name != "__version__":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
     from importlib.metadata import PackageNotFoundError, version
-else:
-    from importlib_metadata import PackageNotFoundError, version
-
-try:
-    dist_name = __name__
-    __version__ = version(dist_name)
-except PackageNotFoundError:
-    __version__ = "unknown"
-finally:
-    del version, PackageNotFoundError
+
+    try:
+        dist_version = version(__name__)
+    except PackageNotFoundError:
+        dist_version = "unknown"
+
+    globals()["__version__"] = dist_version
+    return dist_version
@@ -24,9 +24,10 @@ Search for a column name.  A list of all column names that contain
     data_file.channel_search(search_term)
 """
 import os
+import mmap
 import zipfile
 import re
-from functools import cache
+from functools import cached_property
 
 from xml.etree import ElementTree
 import warnings
@@ -55,6 +56,9 @@ DTYPE_CONVERTERS = {
     "eStringUsi": "U",
 }
 
+# pattern of the references to other elements, e.g. #xpointer(id("usi1") id("usi2"))
+USI_REGEX = re.compile(r'id\("([^"]+)"\)')
+
 
 class OpenFile:
     """Class for opening a National Instruments TDM/TDX file.
@@ -79,22 +83,27 @@ class OpenFile:
                         f"The compressed file {tdm_path} does not contain any readable files."
                     )
                 with zipf.open(zipf.namelist()[0]) as file:
-                    self._root = ElementTree.parse(file).getroot()
+                    self._root, self._by_id = OpenFile._parse_xml(file)
         else:
             with open(tdm_path, "r", encoding=encoding) as file:
-                self._root = ElementTree.parse(file).getroot()
+                self._root, self._by_id = OpenFile._parse_xml(file)
 
         self._namespace = {"usi": self._root.tag.split("}")[0].strip("{")}
 
         self._xml_tdm_root = self._root.find(".//tdm_root")
-        self._xml_chgs = list(
-            map(
-                lambda usi: self._root.find(f".//tdm_channelgroup[@id='{usi}']"),
-                re.findall(
-                    r'id\("(.+?)"\)', self._xml_tdm_root.findtext("channelgroups")
-                ),
+        self._xml_chgs = [
+            self._by_id[usi]
+            for usi in OpenFile._get_usi_from_txt(
+                self._xml_tdm_root.findtext("channelgroups")
             )
-        )
+        ]
+        self._xml_chs = [
+            [
+                self._by_id[usi]
+                for usi in OpenFile._get_usi_from_txt(chg.findtext("channels"))
+            ]
+            for chg in self._xml_chgs
+        ]
 
         byte_order = self._root.find(".//file").get("byteOrder")
         if byte_order == "littleEndian":
@@ -104,7 +113,9 @@ class OpenFile:
         else:
             raise TypeError("Unknown endian format in TDM file")
 
-        self._tdx_order = "C"  # Set binary file reading to column-major style
+        self._blocks = {}
+        self._ch_meta = {}
+        self._tdx_mmap = None
         if tdx_path == "":
             self._tdx_path = os.path.join(
                 self._folder, self._root.find(".//file").get("url")
@@ -112,6 +123,18 @@ class OpenFile:
         else:
             self._tdx_path = tdx_path
 
+    @staticmethod
+    def _parse_xml(file):
+        """Parses the TDM header and indexes all elements carrying an ``id``
+        attribute, so references can be resolved by dict lookup instead of
+        searching the tree."""
+        root = ElementTree.parse(file).getroot()
+        by_id = {
+            elem.get("id"): elem for elem in root.iter() if elem.get("id") is not None
+        }
+
+        return root, by_id
+
     def _channel_xml(self, channel_group, channel, occurrence=0, ch_occurrence=0):
         chs = self._channels_xml(channel_group, occurrence)
 
@@ -121,13 +144,13 @@ class OpenFile:
 
             ch = chs[channel]
         elif isinstance(channel, str):
-            chns = list(filter(lambda x: x.findtext("name") == channel, chs))
-            if len(chns) < ch_occurrence:
+            ch_ind = OpenFile._find_by_name(chs, channel, ch_occurrence)
+            if ch_ind is None:
                 raise IndexError(
                     f"Channel {channel} (occurrence {ch_occurrence}) not found"
                 )
 
-            ch = chns[ch_occurrence]
+            ch = chs[ch_ind]
         else:
             raise TypeError("The given channel parameter type is unsupported")
 
@@ -140,39 +163,105 @@ class OpenFile:
             ):
                 raise IndexError(f"Channel group {channel_group} out of range")
 
-            chg = self._xml_chgs[channel_group]
+            chg_ind = channel_group
         elif isinstance(channel_group, str):
-            chgns = list(
-                filter(lambda x: x.findtext("name") == channel_group, self._xml_chgs)
-            )
-            if len(chgns) <= occurrence:
+            chg_ind = OpenFile._find_by_name(self._xml_chgs, channel_group, occurrence)
+            if chg_ind is None:
                 raise IndexError(
                     f"Channel group {channel_group} (occurrence {occurrence}) not found"
                 )
-
-            chg = chgns[occurrence]
         else:
             raise TypeError("The given channel group parameter type is unsupported")
 
-        chs = list(
-            map(
-                lambda usi: self._root.find(f".//tdm_channel[@id='{usi}']"),
-                OpenFile._get_usi_from_txt(chg.findtext("channels")),
-            )
-        )
+        return self._xml_chs[chg_ind]
+
+    @staticmethod
+    def _find_by_name(elements, name, occurrence=0):
+        """Returns the index of the nth element with the given name or None if there
+        is no such occurrence. Negative occurrences count from the last match."""
+        if not isinstance(occurrence, int):
+            raise TypeError("Only int is accepted as input occurrence.")
+
+        matches = []
+        for i, elem in enumerate(elements):
+            if elem.findtext("name") == name:
+                if len(matches) == occurrence:
+                    return i
+                matches.append(i)
 
-        return chs
+        try:
+            return matches[occurrence]
+        except IndexError:
+            return None
 
     @staticmethod
     def _get_usi_from_txt(txt):
         if txt is None or txt.strip() == "":
             return []
-        return re.findall(r'id\("(.+?)"\)', txt)
+        return USI_REGEX.findall(txt)
+
+    def _block(self, block_id):
+        """Returns byte offset, length and dtype of a TDX block.
+        The attributes are parsed on first access and cached afterwards."""
+        block = self._blocks.get(block_id)
+        if block is None:
+            attribs = self._by_id[block_id].attrib
+            value_type = attribs["valueType"]
+            if value_type == "eTimeUsi":
+                dtype = np.dtype(
+                    [("big", self._endian + "u8"), ("li", self._endian + "i8")]
+                )
+            else:
+                dtype = np.dtype(self._endian + DTYPE_CONVERTERS[value_type])
+            block = (int(attribs["byteOffset"]), int(attribs["length"]), dtype)
+            self._blocks[block_id] = block
+
+        return block
+
+    def _tdx_buffer(self):
+        """Returns a read-only memory map of the whole TDX file, which is shared by
+        all channels. The file is mapped on first access."""
+        if self._tdx_mmap is None:
+            with open(self._tdx_path, "rb") as file:
+                self._tdx_mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return self._tdx_mmap
+
+    def _map_block(self, block_id):
+        offset, length, dtype = self._block(block_id)
+        tdx = self._tdx_buffer()
+        # Blocks are always read front to back, so let the kernel read ahead
+        # aggressively. madvise is not available on all platforms (e.g. Windows).
+        nbytes = length * dtype.itemsize
+        if nbytes and hasattr(mmap, "MADV_SEQUENTIAL"):
+            start = offset - offset % mmap.PAGESIZE
+            tdx.madvise(mmap.MADV_SEQUENTIAL, start, offset + nbytes - start)
 
-    @cache
-    def _get_channels(self, group_id):
-        group = self._xml_chgs[group_id]
-        return {v: i for i, v in enumerate(re.findall(r'id\("(.+?)"\)', group.find("channels").text))}
+        return np.frombuffer(tdx, dtype=dtype, count=length, offset=offset)
+
+    @staticmethod
+    def _normalize_name(name):
+        return name.upper().replace(" ", "")
+
+    @cached_property
+    def _chg_search_names(self):
+        """(name, normalized name) of every channel group, built on the first search."""
+        return [
+            (name, OpenFile._normalize_name(name) if name else "")
+            for name in (chg.findtext("name") for chg in self._xml_chgs)
+        ]
+
+    @cached_property
+    def _ch_search_names(self):
+        """(name, normalized name) of the channels of every channel group,
+        built on the first search."""
+        return [
+            [
+                (name, OpenFile._normalize_name(name) if name else "")
+                for name in (ch.findtext("name") for ch in chs)
+            ]
+            for chs in self._xml_chs
+        ]
 
     def channel_group_search(self, search_term):
         """Returns a list of channel group names that contain ``search term``.
@@ -191,26 +280,13 @@ class OpenFile:
         if not isinstance(search_term, str):
             raise TypeError("I can search for str terms only.")
 
-        chg_names = [
-            x.text
-            for x in self._root.findall(".//tdm_channelgroup/name")
-            if x.text is not None
-        ]
-        search_term = search_term.upper().replace(" ", "")
-        found_terms = [
-            name
-            for name in chg_names
-            if name.upper().replace(" ", "").find(search_term) >= 0
-        ]
+        search_term = OpenFile._normalize_name(search_term)
 
-        ind = []
-        for name in found_terms:
-            for occurence in range(found_terms.count(name)):
-                i = self.channel_group_index(name, occurence)
-                if (name, i) not in ind:
-                    ind.append((name, i))
-
-        return ind
+        return [
+            (name, i)
+            for i, (name, norm_name) in enumerate(self._chg_search_names)
+            if name and norm_name.find(search_term) >= 0
+        ]
 
     def channel_search(self, search_term):
         """Returns a list of channel names that contain ``search term``.
@@ -232,26 +308,19 @@ class OpenFile:
             and column index or channel group and channel indices
             depending on the value of return_column.
         """
-        search_term = str(search_term).upper().replace(" ", "")
+        search_term = OpenFile._normalize_name(str(search_term))
 
         matched_channels = []
-        channel_group_ids = {v: i for i, v in enumerate(x.get("id") for x in self._xml_chgs)}
-
-        for channel in self._root.findall(".//tdm_channel"):
-            channel_name = channel.find("name").text
-            if channel_name:
-                group_uri = re.findall(r'id\("(.+?)"\)', channel.find("group").text)
-                group_id = channel_group_ids.get(group_uri[0])
-                channels = self._get_channels(group_id)
-
-                channel_id = channels.get(channel.get("id"))
-
-                if channel_name.upper().replace(" ", "").find(search_term) >= 0:
+        for group_id, names in enumerate(self._ch_search_names):
+            for channel_id, (channel_name, norm_name) in enumerate(names):
+                if channel_name and norm_name.find(search_term) >= 0:
                     matched_channels.append((channel_name, group_id, channel_id))
 
         return matched_channels
 
-    def channel(self, channel_group, channel, occurrence=0, ch_occurrence=0):
+    def channel(
+        self, channel_group, channel, occurrence=0, ch_occurrence=0, copy=True
+    ):
         """Returns a data channel by its channel group and channel index.
 
         Parameters
@@ -268,84 +337,112 @@ class OpenFile:
             Gives the nth occurrence of the channel name.
             By default the first occurrence is returned.
             This parameter is only used when channel_group is given as a string.
+        copy : bool, Optional
+            If False, explicit channels without invalid values are returned as a
+            read-only view into the TDX file with the data type stored in the file.
+            By default the channel is returned as a newly allocated array.
         """
 
         ch = self._channel_xml(channel_group, channel, occurrence, ch_occurrence)
-        lc_usi = self._get_usi_from_txt(ch.findtext("local_columns"))[0]
-        lc = self._root.find(f".//localcolumn[@id='{lc_usi}']")
-        data_usi = self._get_usi_from_txt(lc.findtext("values"))[0]
-        inc = (
-            self._root.find(f".//*[@id='{data_usi}']").find("values").attrib["external"]
-        )
-        ext_attribs = self._root.find(f".//file/block[@id='{inc}']").attrib
-        seqrep = lc.findtext("sequence_representation")
-        glfl = int(lc.findtext("global_flag"))
-
-        subm_usi = self._get_usi_from_txt(lc.findtext("submatrix"))[0]
-        subm = self._root.find(f".//submatrix[@id='{subm_usi}']")
-        nrows = int(subm.findtext("number_of_rows"))
-
-        valueType = ext_attribs["valueType"]
-        if valueType == "eTimeUsi":
-            endian = self._endian
-            dtype = np.dtype([("big", endian + "u8"), ("li", endian + "i8")])
-        else:
-            dtype = np.dtype(self._endian + DTYPE_CONVERTERS[valueType])
-
-        data_block = np.memmap(
-            self._tdx_path,
-            offset=int(ext_attribs["byteOffset"]),
-            shape=(int(ext_attribs["length"]),),
-            dtype=dtype,
-            mode="r",
-            order=self._tdx_order,
-        ).view(np.recarray)
-
-        flags = lc.findall("flags")
-        if len(flags):
-            flags_inc = flags[0].attrib["external"]
-            flags_attribs = self._root.find(f".//file/block[@id='{flags_inc}']").attrib
-            flags_block = np.memmap(
-                self._tdx_path,
-                offset=int(flags_attribs["byteOffset"]),
-                shape=(int(flags_attribs["length"]),),
-                dtype=np.dtype(
-                    self._endian + DTYPE_CONVERTERS[flags_attribs["valueType"]]
-                ),
-                mode="r",
-                order=self._tdx_order,
-            ).view(np.recarray)
-            nnans = np.where(flags_block == 0)[0].shape[0]
+
+        return self._read_channel(ch, copy)
+
+    def _channel_meta(self, ch):
+        """Returns the data block id, flags block id, sequence representation,
+        number of rows and generation parameters of a channel.
+        They are resolved from the XML on first access and cached afterwards."""
+        meta = self._ch_meta.get(ch.get("id"))
+        if meta is None:
+            lc_usi = self._get_usi_from_txt(ch.findtext("local_columns"))[0]
+            lc = self._by_id[lc_usi]
+            data_usi = self._get_usi_from_txt(lc.findtext("values"))[0]
+            inc = self._by_id[data_usi].find("values").attrib["external"]
+            flags = lc.find("flags")
+            flags_inc = None if flags is None else flags.attrib["external"]
+            seqrep = lc.findtext("sequence_representation")
+
+            subm_usi = self._get_usi_from_txt(lc.findtext("submatrix"))[0]
+            subm = self._by_id[subm_usi]
+            nrows = int(subm.findtext("number_of_rows"))
+
+            gen_params = lc.findtext("generation_parameters")
+            meta = (inc, flags_inc, seqrep, nrows, gen_params)
+            self._ch_meta[ch.get("id")] = meta
+
+        return meta
+
+    def _read_channel(self, ch, copy=True):
+        inc, flags_inc, seqrep, nrows, gen_params = self._channel_meta(ch)
+
+        data_block = self._map_block(inc)
+
+        if flags_inc is not None:
+            flags_block = self._map_block(flags_inc)
+            invalid = flags_block == 0
+            nnans = np.count_nonzero(invalid)
         else:
             nnans = 0
-            flags_block = glfl * np.ones((nrows,), int)
 
         if seqrep == "explicit":
-            if valueType == "eTimeUsi":
+            if data_block.dtype.names is not None:  # eTimeUsi
                 epoch_difference_seconds = -2082844800
-                s = (data_block.field(1) + epoch_difference_seconds).astype("datetime64[s]")
-                ns = (data_block.field(0) * 2**(-64) * 1e18).astype("timedelta64[as]").astype("timedelta64[ns]")
+                s = (data_block["li"] + epoch_difference_seconds).astype("datetime64[s]")
+                ns = (data_block["big"] * 2**(-64) * 1e18).astype("timedelta64[as]").astype("timedelta64[ns]")
                 column = s + ns
-            else:
+            elif copy or nnans:
                 column = np.array(data_block, float)
+            else:
+                column = data_block
             if nnans:
-                column[np.where(flags_block == 0)] = np.nan
+                column[invalid] = np.nan
         elif seqrep == "implicit_linear":
             # for time channels. contins two float values
             # for building time scale (constant step width)
             offset = data_block[0]
-            column = np.array(range(0, nrows)) * data_block[-1] + offset 
+            column = np.arange(nrows) * data_block[-1] + offset
         elif seqrep == "raw_linear":
             # mapped to proprtional integer scale. needs to be re-scaled to actual values
-            offset, slope = np.asarray(
-                lc.findtext("generation_parameters").split(), float
-            )
-            column = slope * np.array(data_block) + offset
+            offset, slope = np.asarray(gen_params.split(), float)
+            column = np.multiply(data_block, slope, dtype=np.float64)
+            column += offset
             if nnans:
-                column[np.where(flags_block == 0)] = np.nan
+                column[invalid] = np.nan
 
         return column
 
+    def channels(self, channel_group, indices=None, occurrence=0):
+        """Returns several data channels of a channel group at once.
+
+        Parameters
+        ----------
+        channel_group : int or str
+            The index or name of the channel group.
+        indices : iterable of int, Optional
+            The indices of the channels inside the group.
+            By default all channels of the group are returned.
+        occurrence : int, Optional
+            Gives the nth occurrence of the channel group name.
+            By default the first occurrence is returned.
+            This parameter is only used when channel_group is given as a string.
+
+        Returns
+        -------
+        channels : list of numpy.ndarray
+            The channels in the order given by ``indices``.
+        """
+        chs = self._channels_xml(channel_group, occurrence)
+        if indices is None:
+            return [self._read_channel(ch) for ch in chs]
+
+        indices = list(indices)
+        for channel in indices:
+            if not isinstance(channel, int):
+                raise TypeError("Only integer channel indices are allowed.")
+            if len(chs) <= channel or channel < -len(chs):
+                raise IndexError(f"Channel {channel} out of range")
+
+        return [self._read_channel(chs[channel]) for channel in indices]
+
     def channel_dict(self, channel_group, occurrence=0):
         """Returns a dict representation of a channel group.
 
@@ -363,12 +460,12 @@ class OpenFile:
         if isinstance(channel_group, int):
             channel_dict = {}
             name_doublets = set()
-            for i in range(self.no_channels(channel_group)):
-                name = self.channel_name(channel_group, i)
-                ch = self.channel(channel_group, i)
+            chs = self._channels_xml(channel_group)
+            for xml_ch, ch in zip(chs, self.channels(channel_group)):
+                name = xml_ch.findtext("name")
                 if name in channel_dict:
                     name_doublets.add(name)
-                channel_dict[name] = np.array(ch)
+                channel_dict[name] = ch
             if len(name_doublets) > 0:
                 warnings.warn(f"Duplicate channel name(s): {name_doublets}")
             return channel_dict
@@ -459,26 +556,21 @@ class OpenFile:
         """
         if not isinstance(channel_group_name, str):
             raise TypeError("Only str is accepted as input channel_group_name.")
-        list_len = -1
-        try:
-            chgn = [
-                i
-                for i, chg in enumerate(self._xml_chgs)
-                if chg.findtext("name") == channel_group_name
-            ]
-            list_len = len(chgn)
 
-            return chgn[occurrence]
-        except IndexError as err:
-            if list_len == 0:
-                raise ValueError(
-                    f"Channel group name {channel_group_name} does not exist"
-                ) from err
+        chg_ind = OpenFile._find_by_name(self._xml_chgs, channel_group_name, occurrence)
+        if chg_ind is not None:
+            return chg_ind
 
-            raise IndexError(
-                f"The channel group name {channel_group_name} "
-                f"does only occur {str(list_len)} time(s)"
-            ) from err
+        list_len = sum(
+            chg.findtext("name") == channel_group_name for chg in self._xml_chgs
+        )
+        if list_len == 0:
+            raise ValueError(f"Channel group name {channel_group_name} does not exist")
+
+        raise IndexError(
+            f"The channel group name {channel_group_name} "
+            f"does only occur {str(list_len)} time(s)"
+        )
 
     def no_channel_groups(self):
         """Returns the total number of channel groups."""
@@ -489,34 +581,26 @@ class OpenFile:
 
         Parameters
         ----------
-        channel_group : int
-            The index of the channel group.
+        channel_group : int or str
+            The index or name of the channel group.
         """
-        if isinstance(channel_group, str):
-            return len(
-                OpenFile._get_usi_from_txt(
-                    list(
-                        filter(
-                            lambda x: x.findtext("name") == channel_group,
-                            self._xml_chgs,
-                        )
-                    )[0].findtext("channels")
-                )
-            )
-        elif isinstance(channel_group, int):
-            if len(self._xml_chgs) <= channel_group or channel_group < -len(
-                self._xml_chgs
-            ):
-                raise IndexError(f"Channel group {channel_group} out of range")
-
-            return len(
-                OpenFile._get_usi_from_txt(
-                    self._xml_chgs[channel_group].findtext("channels")
-                )
-            )
-        else:
+        if not isinstance(channel_group, (int, str)):
             raise TypeError("Unsupported channel_group type")
 
+        return len(self._channels_xml(channel_group))
+
+    def close(self):
+        """Releases the memory map of the TDX file.
+        The file is mapped again if channels are read afterwards."""
+        if self._tdx_mmap is not None:
+            try:
+                self._tdx_mmap.close()
+            except BufferError:
+                # Channels returned with copy=False still reference the map.
+                # It is closed as soon as they are garbage collected.
+                pass
+            self._tdx_mmap = None
+
     def __getitem__(self, key):
         if isinstance(key, tuple):
             if len(key) != 2:
@@ -534,6 +618,12 @@ class OpenFile:
         else:
             raise TypeError("Unsupported parameter type.")
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def __len__(self):
         return self.no_channel_groups()
 
@@ -30,9 +30,9 @@ def test_channel_accessibility(tdm_file):
 
 
 # pylint: disable=redefined-outer-name
-def test_invalid_channel_raises_error(tdm_file):
-    """Invalid channel numbers raise an error"""
-    arg_arr = [
+@pytest.mark.parametrize(
+    "args",
+    [
         (-4, -1),
         (-4, 0),
         (0, -4),
@@ -40,56 +40,38 @@ def test_invalid_channel_raises_error(tdm_file):
         (0, 3),
         (1, 2),
         (2, 1),
-        (1, 2),
-        (3, 0),
-    ]
-
-    for ch in arg_arr:
-        with pytest.raises(IndexError):
-            tdm_file.channel(*ch)
+        (-1, 0),
+        (-1, -1),
+        (0, "lala"),
+    ],
+)
+def test_invalid_channel_raises_error(tdm_file, args):
+    """Invalid channel numbers raise an error"""
+    with pytest.raises(IndexError):
+        tdm_file.channel(*args)
 
 
 # pylint: disable=redefined-outer-name
-def test_get_channel_by_index(tdm_file):
+@pytest.mark.parametrize(
+    "args,kwargs,expected",
+    [
+        ((0, 0), {}, [1, 2, 3, 4]),
+        ((0, 1), {}, [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]),
+        ((0, 2), {}, [9, 10, 11, -50, 2147483647, -2147483647 - 1]),
+        ((1, 0), {}, [1.7976931348623157e308, 2147483647]),
+        ((1, 1), {}, [0]),
+        (("channel2_test123$$?", "Float_4_Integers"), {}, [1, 2, 3, 4]),
+        ((0, "Float as Float"), {}, [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]),
+        ((0, "Integer32_with_max_min"), {}, [9, 10, 11, -50, 2147483647, -2147483648]),
+        (("channel2", 0), {}, [1.7976931348623157e308, 2147483647]),
+        (("channel2", 1), {}, [0]),
+        (("channel2", ""), {}, [1.7976931348623157e308, 2147483647]),
+        (("channel2", ""), {"ch_occurrence": 1}, [0]),
+    ],
+)
+def test_get_channel_by_index(tdm_file, args, kwargs, expected):
     """Channels can be accessed by the channel function"""
-    assert_array_equal(tdm_file.channel(0, 0), np.array([1, 2, 3, 4]))
-    assert_array_equal(tdm_file.channel(0, 1), np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6]))
-
-    assert_array_equal(
-        tdm_file.channel(0, 2), np.array([9, 10, 11, -50, 2147483647, -2147483647 - 1])
-    )
-    assert_array_equal(
-        tdm_file.channel(1, 0), np.array([1.7976931348623157e308, 2147483647])
-    )
-    assert_array_equal(tdm_file.channel(1, 1), np.array([0]))
-    assert_array_equal(
-        tdm_file.channel("channel2_test123$$?", "Float_4_Integers"),
-        np.array([1, 2, 3, 4]),
-    )
-    assert_array_equal(
-        tdm_file.channel(0, "Float as Float"), np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6])
-    )
-    assert_array_equal(
-        tdm_file.channel(0, "Integer32_with_max_min"),
-        np.array(
-            [
-                9,
-                10,
-                11,
-                -50,
-                2147483647,
-                -2147483648,
-            ]
-        ),
-    )
-    assert_array_equal(
-        tdm_file.channel("channel2", 0), np.array([1.7976931348623157e308, 2147483647])
-    )
-    assert_array_equal(tdm_file.channel("channel2", 1), np.array([0]))
-    assert_array_equal(
-        tdm_file.channel("channel2", ""), np.array([1.7976931348623157e308, 2147483647])
-    )
-    assert_array_equal(tdm_file.channel("channel2", "", ch_occurrence=1), np.array([0]))
+    assert_array_equal(tdm_file.channel(*args, **kwargs), np.array(expected))
 
 
 # pylint: disable=redefined-outer-name
@@ -106,21 +88,34 @@ def test_get_channel_group_by_str(tdm_file):
 
 
 # pylint: disable=redefined-outer-name
-def test_channel_invalid_type(tdm_file):
-    """Channel raise TypErrors on invalid types"""
-    invalids = [
+@pytest.mark.parametrize(
+    "invalid",
+    [
         (0.0, 1.0),
-        (-1, 0),
-        (0, -1),
-        (-1, -1),
-        (0, "lala"),
-        (0, 0, 1),
+        (0, 0.0),
         (0.0, 1, "lala"),
         (0.0, 1, 1.0),
-    ]
-    for invalid in invalids:
-        with pytest.raises(TypeError):
-            tdm_file.channel(invalid)
+    ],
+)
+def test_channel_invalid_type(tdm_file, invalid):
+    """Channel raise TypErrors on invalid types"""
+    with pytest.raises(TypeError):
+        tdm_file.channel(*invalid)
+
+
+# pylint: disable=redefined-outer-name
+@pytest.mark.parametrize(
+    "args,kwargs",
+    [
+        (("channel2", ""), {"ch_occurrence": 1.0}),
+        (("channel2", 0), {"occurrence": 0.0}),
+        (("channel2", ""), {"ch_occurrence": "1"}),
+    ],
+)
+def test_channel_invalid_occurrence_type(tdm_file, args, kwargs):
+    """Non-integer occurrences raise a TypeError"""
+    with pytest.raises(TypeError):
+        tdm_file.channel(*args, **kwargs)
 
 
 # pylint: disable=redefined-outer-name
@@ -153,6 +148,20 @@ def test_channel_group_name(tdm_file):
         tdm_file.channel_group_name(0.0)
 
 
+# pylint: disable=redefined-outer-name
+def test_get_channel_without_copy(tdm_file):
+    """Explicit channels can be returned as read-only views"""
+    channel = tdm_file.channel(0, 1, copy=False)
+    assert_array_equal(channel, np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6]))
+    assert not channel.flags.writeable
+
+    channel = tdm_file.channel(0, 2, copy=False)
+    assert channel.dtype.kind == "i"
+    assert_array_equal(channel, np.array([9, 10, 11, -50, 2147483647, -2147483648]))
+
+    assert tdm_file.channel(0, 2).flags.writeable
+
+
 # pylint: disable=redefined-outer-name
 def test_channel_group_search(tdm_file):
     """Searches for channel groups"""
@@ -175,6 +184,32 @@ def test_channel_group_search(tdm_file):
             tdm_file.channel_group_search(bad_type)
 
 
+def test_channel_group_search_duplicate_names(tmp_path):
+    """Groups with duplicate names are returned in channel group order"""
+    test_dir = os.path.splitext(__file__)[0]
+    with open(f"{test_dir}/test_sample0001.tdm", "r", encoding="utf-8") as file:
+        header = file.read()
+    # Rename the first group, so that the group names are channel3, channel2, channel3
+    path = tmp_path / "duplicate_groups.tdm"
+    path.write_text(
+        header.replace("<name>channel2_test123$$?</name>", "<name>channel3</name>"),
+        encoding="utf-8",
+    )
+    tdm_file = tdm.OpenFile(str(path), f"{test_dir}/test_sample0001.tdx")
+
+    assert tdm_file.channel_group_search("channel") == [
+        ("channel3", 0),
+        ("channel2", 1),
+        ("channel3", 2),
+    ]
+    assert tdm_file.channel_group_search("channel3") == [
+        ("channel3", 0),
+        ("channel3", 2),
+    ]
+    assert tdm_file.channel_group_index("channel3", 1) == 2
+    assert tdm_file.channel_group_index("channel3", -1) == 2
+
+
 # pylint: disable=redefined-outer-name
 def test_channel_name(tdm_file):
     """channel_name returns correct channel names"""
@@ -212,21 +247,44 @@ def test_channel_search(tdm_file):
 # pylint: disable=redefined-outer-name
 def test_channel_dict(tdm_file):
     """Return a dictonary of channels"""
+    channel_dict = tdm_file.channel_dict(0)
     assert_array_equal(
-        tdm_file.channel_dict(0)["Integer32_with_max_min"],
+        channel_dict["Integer32_with_max_min"],
         np.array([9, 10, 11, -50, 2147483647, -2147483648]),
     )
     assert_array_equal(
-        tdm_file.channel_dict(0)["Float as Float"],
+        channel_dict["Float as Float"],
         np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6]),
     )
-    assert_array_equal(
-        tdm_file.channel_dict(0)["Float_4_Integers"], np.array([1, 2, 3, 4])
-    )
+    assert_array_equal(channel_dict["Float_4_Integers"], np.array([1, 2, 3, 4]))
 
     assert_array_equal(tdm_file.channel_dict(1)[""], np.array([0]))
 
 
+# pylint: disable=redefined-outer-name
+def test_channels(tdm_file):
+    """Several channels of a group can be read at once"""
+    channels = tdm_file.channels(0)
+    assert len(channels) == 3
+    for i, channel in enumerate(channels):
+        assert_array_equal(channel, tdm_file.channel(0, i))
+
+    channels = tdm_file.channels("channel2", [1, 0])
+    assert_array_equal(channels[0], np.array([0]))
+    assert_array_equal(channels[1], np.array([1.7976931348623157e308, 2147483647]))
+
+    channels = tdm_file.channels(0, (i for i in range(2)))
+    assert len(channels) == 2
+    assert_array_equal(channels[0], tdm_file.channel(0, 0))
+    assert_array_equal(channels[1], tdm_file.channel(0, 1))
+
+    assert tdm_file.channels(2) == []
+    with pytest.raises(IndexError):
+        tdm_file.channels(0, [0, 3])
+    with pytest.raises(TypeError):
+        tdm_file.channels(0, ["Float as Float"])
+
+
 # pylint: disable=redefined-outer-name
 def test_channel_dict_idx_err(tdm_file):
     """Raise an error on bad numbers for channel_dict"""
@@ -334,3 +392,26 @@ def test_get_item_err(tdm_file):
     with pytest.raises(IndexError):
         # pylint: disable=pointless-statement
         tdm_file[-6]
+
+
+def test_context_manager():
+    """The TDX file is released when leaving the with block"""
+    # pylint: disable=protected-access
+    path = f"{os.path.splitext(__file__)[0]}/test_sample0001.tdm"
+    with tdm.OpenFile(path) as tdm_file:
+        assert_array_equal(tdm_file.channel(0, 0), np.array([1, 2, 3, 4]))
+        assert tdm_file._tdx_mmap is not None
+    assert tdm_file._tdx_mmap is None
+
+    # Channels can still be read after closing the file
+    assert_array_equal(tdm_file.channel(0, 0), np.array([1, 2, 3, 4]))
+    tdm_file.close()
+
+    # Views returned with copy=False stay valid after closing the file
+    view = tdm_file.channel(0, 1, copy=False)
+    tdm_file.close()
+    assert tdm_file._tdx_mmap is None
+    assert_array_equal(view, np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6]))
+    assert_array_equal(tdm_file.channel(0, 0), np.array([1, 2, 3, 4]))
+    assert tdm_file._tdx_mmap is not None
+    tdm_file.close()